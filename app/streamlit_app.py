@@ -10,7 +10,6 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 import re
-import time
 from io import StringIO
 from typing import List
 
@@ -20,8 +19,11 @@ import streamlit as st
 from src.transform import prepare_financials
 from src.metrics import compute_metrics
 from src.scoring import score_companies, DEFAULT_WEIGHTS
-from src.export import export_report_cards
+from src.export import export_report_cards, for_export
 from src.viz import plot_peer_heatmap
+from src.refresh import WATCHLIST, RefreshService
+
+DEFAULT_TICKERS = "AAPL, MSFT, NVDA, AMZN, GOOGL, META"
 
 
 # ---------------------------
@@ -43,16 +45,13 @@ def parse_tickers_text(s: str) -> list[str]:
     return sorted(set(cleaned))
 
 
-@st.cache_data(show_spinner=False, ttl=3600)
-def fetch_sec_cached_keyed(key: tuple[str, ...]) -> pd.DataFrame:
+@st.cache_resource(show_spinner=False)
+def get_refresh_service() -> RefreshService:
     """
-    Cache by a stable tuple of tickers (and optional nonce).
-    Import inside the function to keep cache key minimal.
+    One background refresh worker per server process, shared by every session.
+    Data lives in a SQLite cache, so other processes read the same warm rows.
     """
-    from src.ingest_sec import fetch_bulk  # local import for cache stability
-
-    tickers = [k for k in key if not k.startswith("nonce:")]
-    return fetch_bulk(tickers)
+    return RefreshService(watchlist=WATCHLIST).start()
 
 
 def load_sample() -> pd.DataFrame:
@@ -68,6 +67,8 @@ def parse_uploaded(file) -> pd.DataFrame:
 # UI
 # ---------------------------
 st.set_page_config(page_title="Alex's Corporate Health Dashboard", layout="wide")
+# Start the background worker on first page load, not on the first Run click
+refresh_service = get_refresh_service()
 st.title("Alex's Corporate Health Dashboard")
 
 st.markdown(
@@ -84,15 +85,24 @@ with st.sidebar:
     tickers_text = ""
     force_refresh = False
     if mode == "SEC fetch (US tickers)":
-        default = "AAPL, MSFT, NVDA, AMZN, GOOGL, META"
-        tickers_text = st.text_area("Tickers (comma, space, or newline separated)", default, height=100)
+        tickers_text = st.text_area("Tickers (comma, space, or newline separated)", DEFAULT_TICKERS, height=100)
         st.caption("Tip: You can write `AAPL MSFT NVDA` or one ticker per line.")
-        force_refresh = st.checkbox("Force refresh live data", value=False)
+        force_refresh = st.checkbox(
+            "Force refresh live data",
+            value=False,
+            help="Refetch only the tickers above; cached data for other tickers is kept.",
+        )
 
     uploaded = None
     if mode == "Upload CSV":
         uploaded = st.file_uploader("Upload financials CSV", type=["csv"])
 
+    compact = st.checkbox(
+        "Compact memory mode",
+        value=False,
+        help="Categorical tickers and float32 ratios and scores; useful for large multi-year panels.",
+    )
+
     st.header("Weights")
     p = st.slider("Profitability", 0.0, 1.0, float(DEFAULT_WEIGHTS["profitability"]), 0.05)
     lq = st.slider("Liquidity", 0.0, 1.0, float(DEFAULT_WEIGHTS["liquidity"]), 0.05)
@@ -124,17 +134,18 @@ if go:
             st.error("Provide at least one valid ticker")
             st.stop()
 
-        key: tuple[str, ...] = tuple(tickers)
-        if force_refresh:
-            key = key + (f"nonce:{int(time.time())}",)
-
         with st.spinner("Fetching SEC fundamentals and latest prices..."):
-            fin = fetch_sec_cached_keyed(key)
+            fin = refresh_service.get(tickers, force=force_refresh)
 
     if fin.empty:
         st.error("No financial data found")
         st.stop()
 
+    if "error" in fin.columns:
+        failed = fin.loc[fin["error"].notna(), ["ticker", "error"]]
+        if not failed.empty:
+            st.warning("\n".join(f"- **{t}**: {e}" for t, e in zip(failed["ticker"], failed["error"])))
+
     # Optional caption with price as-of dates if present
     if "price_asof" in fin.columns:
         asof_vals = sorted({v for v in fin["price_asof"].dropna().unique().tolist()})
@@ -142,10 +153,10 @@ if go:
             st.caption(f"Price data as of: {', '.join(asof_vals)}")
 
     # Transform, score, display
-    fin_norm = prepare_financials(fin)
-    metrics = compute_metrics(fin_norm)
+    fin_norm = prepare_financials(fin, compact=compact)
+    metrics = compute_metrics(fin_norm, compact=compact)
     weights = {"profitability": p, "liquidity": lq, "leverage": lev, "cash_gen": cg}
-    scored = score_companies(metrics, weights)
+    scored = score_companies(metrics, weights, compact=compact)
 
     st.subheader("Ranking")
     display_cols = [
@@ -172,7 +183,7 @@ if go:
 
     st.subheader("Exports")
     export_report_cards(scored, "outputs/company_report_cards.xlsx")
-    scored.to_csv("outputs/metrics_long.csv", index=False)
+    for_export(scored).to_csv("outputs/metrics_long.csv", index=False)
     st.success("Saved Excel report and CSV to outputs/")
     st.download_button(
         "Download report cards (Excel)",
@@ -1,9 +1,21 @@
 # src/export.py
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 
+def for_export(df: pd.DataFrame, decimals: int = 6) -> pd.DataFrame:
+    """
+    Upcast float32 columns (compact mode) to float64 rounded to `decimals`,
+    so files show 2.4875 rather than 2.487499952316284.
+    """
+    f32 = [c for c in df.columns if df[c].dtype == np.float32]
+    if not f32:
+        return df
+    return df.astype({c: float for c in f32}).round({c: decimals for c in f32})
+
+
 def export_report_cards(scored: pd.DataFrame, path_xlsx: str) -> None:
     """
     Export a compact Excel with the main KPIs and scores.
@@ -27,4 +39,4 @@ def export_report_cards(scored: pd.DataFrame, path_xlsx: str) -> None:
     ]
     present = [c for c in cols if c in scored.columns]
     with pd.ExcelWriter(path_xlsx) as xw:
-        scored[present].to_excel(xw, sheet_name="Scores", index=False)
\ No newline at end of file
+        for_export(scored[present]).to_excel(xw, sheet_name="Scores", index=False)
\ No newline at end of file
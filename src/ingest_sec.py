@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import os
+import threading
 from functools import lru_cache
 from typing import Dict, Iterable, Optional, Tuple
 
@@ -11,6 +12,8 @@ import yfinance as yf
 
 SEC_BASE = "https://data.sec.gov/api"
 UA = os.environ.get("SEC_USER_AGENT", "corp-health-dashboard (you@example.com)")
+# Refresh workers resolve CIKs concurrently; download the mapping only once
+_TICKER_MAP_LOCK = threading.Lock()
 
 
 def _get_json(url: str, params: Optional[dict] = None) -> dict:
@@ -56,7 +59,8 @@ def _normalize_ticker_for_sec(t: str) -> str:
 def _resolve_cik(ticker: str) -> str:
     """Resolve a ticker to a 10-digit CIK string."""
     t = _normalize_ticker_for_sec(ticker)
-    mapping = _ticker_map()
+    with _TICKER_MAP_LOCK:
+        mapping = _ticker_map()
     if t in mapping:
         return mapping[t]
     # Fallback: try base symbol if class suffix present
@@ -4,24 +4,32 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-def safe_div(a, b):
+def safe_div(a, b, dtype=float):
     """
     Robust elementwise division that never raises ZeroDivisionError.
-    Returns np.ndarray with NaN where denominator is ~0.
+    Returns np.ndarray with NaN where denominator is ~0, computed in float64 and cast to `dtype`.
     """
     a_arr = np.asarray(pd.to_numeric(a, errors="coerce"), dtype=float)
     b_arr = np.asarray(pd.to_numeric(b, errors="coerce"), dtype=float)
     out = np.full_like(a_arr, np.nan, dtype=float)
     with np.errstate(divide="ignore", invalid="ignore"):
         np.divide(a_arr, b_arr, out=out, where=np.abs(b_arr) > 1e-12)
-    return out
+    return out.astype(dtype, copy=False)
 
-def compute_metrics(fin: pd.DataFrame, price_col: str = "price", shares_col: str = "shares_basic") -> pd.DataFrame:
+def compute_metrics(
+    fin: pd.DataFrame,
+    price_col: str = "price",
+    shares_col: str = "shares_basic",
+    compact: bool = False,
+) -> pd.DataFrame:
     """
     Compute decision-ready finance metrics from normalized financials.
     Safely coerces inputs to numeric and avoids zero-division.
+    With compact=True ratios are float32 (amounts stay float64) and `fin` itself is
+    modified (inputs coerced, metric columns added) and returned; pass a copy to keep the original.
     """
-    df = fin.copy()
+    df = fin if compact else fin.copy()
+    dtype = np.float32 if compact else float
 
     # Coerce expected numeric fields; create if missing
     num_cols = [
@@ -40,23 +48,23 @@ def compute_metrics(fin: pd.DataFrame, price_col: str = "price", shares_col: str
     df["enterprise_value"] = df["market_cap"] + df["net_debt"]
 
     # Profitability
-    df["ebit_margin"] = safe_div(df["ebit"], df["revenue"])
-    df["ebitda_margin"] = safe_div(df["ebitda"], df["revenue"])
-    df["roa"] = safe_div(df["net_income"], df["total_assets"])
-    df["roe"] = safe_div(df["net_income"], df["shareholders_equity"])
+    df["ebit_margin"] = safe_div(df["ebit"], df["revenue"], dtype=dtype)
+    df["ebitda_margin"] = safe_div(df["ebitda"], df["revenue"], dtype=dtype)
+    df["roa"] = safe_div(df["net_income"], df["total_assets"], dtype=dtype)
+    df["roe"] = safe_div(df["net_income"], df["shareholders_equity"], dtype=dtype)
 
     # Liquidity & working capital
-    df["current_ratio"] = safe_div(df["current_assets"], df["current_liabilities"])
-    df["quick_ratio"] = safe_div(df["current_assets"] - df["inventory"], df["current_liabilities"])
+    df["current_ratio"] = safe_div(df["current_assets"], df["current_liabilities"], dtype=dtype)
+    df["quick_ratio"] = safe_div(df["current_assets"] - df["inventory"], df["current_liabilities"], dtype=dtype)
 
     # Leverage
-    df["debt_to_equity"] = safe_div(df["short_term_debt"] + df["long_term_debt"], df["shareholders_equity"])
-    df["net_debt_to_ebitda"] = safe_div(df["net_debt"], df["ebitda"])
+    df["debt_to_equity"] = safe_div(df["short_term_debt"] + df["long_term_debt"], df["shareholders_equity"], dtype=dtype)
+    df["net_debt_to_ebitda"] = safe_div(df["net_debt"], df["ebitda"], dtype=dtype)
 
     # Cash generation & valuation helper
-    df["ocf_margin"] = safe_div(df["operating_cf"], df["revenue"])
+    df["ocf_margin"] = safe_div(df["operating_cf"], df["revenue"], dtype=dtype)
     df["fcf"] = df["operating_cf"] - np.abs(df["capex"])
-    df["fcf_margin"] = safe_div(df["fcf"], df["revenue"])
-    df["ev_ebitda"] = safe_div(df["enterprise_value"], df["ebitda"])
+    df["fcf_margin"] = safe_div(df["fcf"], df["revenue"], dtype=dtype)
+    df["ev_ebitda"] = safe_div(df["enterprise_value"], df["ebitda"], dtype=dtype)
 
     return df
\ No newline at end of file
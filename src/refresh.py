@@ -0,0 +1,305 @@
+# src/refresh.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from contextlib import closing
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.ingest_sec import _normalize_ticker_for_sec, fetch_bulk
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.environ.get("CACHE_PATH", "outputs/cache.sqlite")
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "3600"))
+REFRESH_INTERVAL = float(os.environ.get("REFRESH_INTERVAL", "300"))
+REFRESH_WORKERS = int(os.environ.get("REFRESH_WORKERS", "4"))
+# Cached tickers nobody has read for this long are left to expire instead of refreshed
+ACTIVE_WINDOW = float(os.environ.get("REFRESH_ACTIVE_WINDOW", "86400"))
+WATCHLIST = [t for t in re.split(r"[,\s;]+", os.environ.get("REFRESH_WATCHLIST", "")) if t]
+
+
+def _clean(tickers: Iterable[str]) -> List[str]:
+    """Normalize to SEC style and drop blanks/duplicates, keeping order."""
+    return list(dict.fromkeys(t for t in (_normalize_ticker_for_sec(str(x)) for x in tickers) if t))
+
+
+class SharedCache:
+    """
+    Per-ticker fetch results in a local SQLite file.
+    Safe to share across threads, Streamlit sessions and server processes.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS fundamentals ("
+                "ticker TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, tickers: Iterable[str]) -> pd.DataFrame:
+        """Return cached rows for the tickers (request order) and mark them as recently read."""
+        wanted = _clean(tickers)
+        if not wanted:
+            return pd.DataFrame()
+        marks = ",".join("?" * len(wanted))
+        with closing(self._connect()) as con, con:
+            rows = dict(con.execute(f"SELECT ticker, payload FROM fundamentals WHERE ticker IN ({marks})", wanted))
+            con.execute(f"UPDATE fundamentals SET accessed_at = ? WHERE ticker IN ({marks})", [time.time(), *wanted])
+        records = [json.loads(rows[t]) for t in wanted if t in rows]
+        return pd.DataFrame(records)
+
+    def put(self, df: pd.DataFrame) -> None:
+        """Upsert one row per ticker. Rows carrying an 'error' are not cached so they get retried."""
+        if df.empty or "ticker" not in df.columns:
+            return
+        if "error" in df.columns:
+            df = df[df["error"].isna()].drop(columns="error")
+        now = time.time()
+        entries = []
+        for rec in df.to_dict("records"):
+            payload = {k: v for k, v in rec.items() if not pd.isna(v)}
+            entries.append((rec["ticker"], json.dumps(payload, default=str), now, now))
+        with closing(self._connect()) as con, con:
+            con.executemany(
+                "INSERT INTO fundamentals (ticker, payload, fetched_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(ticker) DO UPDATE SET payload = excluded.payload, fetched_at = excluded.fetched_at",
+                entries,
+            )
+
+    def invalidate(self, tickers: Iterable[str]) -> None:
+        """Drop only the given tickers; everything else stays warm."""
+        wanted = _clean(tickers)
+        if not wanted:
+            return
+        marks = ",".join("?" * len(wanted))
+        with closing(self._connect()) as con, con:
+            con.execute(f"DELETE FROM fundamentals WHERE ticker IN ({marks})", wanted)
+
+    def fetched_at(self, tickers: Iterable[str]) -> Dict[str, float]:
+        """Return {ticker: unix time of last fetch} for the tickers that are cached."""
+        wanted = _clean(tickers)
+        if not wanted:
+            return {}
+        marks = ",".join("?" * len(wanted))
+        with closing(self._connect()) as con:
+            return dict(con.execute(f"SELECT ticker, fetched_at FROM fundamentals WHERE ticker IN ({marks})", wanted))
+
+    def stale(self, ttl: float, active_within: Optional[float] = None) -> List[str]:
+        """Tickers fetched more than `ttl` seconds ago, optionally only those read within `active_within`."""
+        now = time.time()
+        sql = "SELECT ticker FROM fundamentals WHERE fetched_at < ?"
+        params = [now - ttl]
+        if active_within is not None:
+            sql += " AND accessed_at >= ?"
+            params.append(now - active_within)
+        with closing(self._connect()) as con:
+            return [r[0] for r in con.execute(sql, params)]
+
+
+class RefreshService:
+    """
+    Background worker that keeps the shared cache warm.
+
+    Every `interval` seconds it refetches watchlist tickers that are missing or older
+    than `ttl`, plus cached tickers that are stale and were read recently. Background
+    passes run on the service's own pool; user requests for missing tickers use a
+    separate foreground pool so they never queue behind a refresh batch. A ticker is
+    fetched at most once at a time: requests join a fetch already in flight, and a
+    foreground request takes over a background fetch that has not started yet.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[SharedCache] = None,
+        watchlist: Iterable[str] = WATCHLIST,
+        interval: float = REFRESH_INTERVAL,
+        ttl: float = CACHE_TTL,
+        active_within: float = ACTIVE_WINDOW,
+        max_workers: int = REFRESH_WORKERS,
+        fetcher: Callable[..., pd.DataFrame] = fetch_bulk,
+    ):
+        self.cache = cache or SharedCache()
+        self.watchlist = _clean(watchlist)
+        self.interval = interval
+        self.ttl = ttl
+        self.active_within = active_within
+        self.fetcher = fetcher
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh")
+        self._fg_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh-fg")
+        self._inflight: Dict[str, Tuple[Future, ThreadPoolExecutor]] = {}
+        self._pending: set[str] = set()
+        # Reentrant: a future's done-callback can run inside submit()/cancel() under the lock
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "RefreshService":
+        """Start the scheduler thread (no-op if already running)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the scheduler and release both worker pools."""
+        self._stop.set()
+        self._wake.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=True)
+        self._fg_pool.shutdown(wait=True)
+
+    def request(self, tickers: Iterable[str]) -> None:
+        """Queue tickers for the next background refresh and wake the scheduler."""
+        with self._lock:
+            self._pending.update(_clean(tickers))
+        self._wake.set()
+
+    def fetch(self, tickers: Iterable[str], background: bool = False) -> pd.DataFrame:
+        """
+        Fetch tickers and publish the results to the shared cache.
+        Foreground fetches (the default) use their own pool; background=True uses the refresh pool.
+        """
+        wanted = _clean(tickers)
+        if not wanted:
+            return pd.DataFrame()
+        futures = self._submit(wanted, self._pool if background else self._fg_pool)
+        frames = [self._result(t, futures[t]) for t in wanted]
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _submit(self, tickers: List[str], pool: ThreadPoolExecutor) -> Dict[str, Future]:
+        futures: Dict[str, Future] = {}
+        with self._lock:
+            for t in tickers:
+                entry = self._inflight.get(t)
+                if entry is not None:
+                    fut, owner = entry
+                    # Reuse unless a foreground request can pull a queued background fetch forward
+                    if owner is self._fg_pool or pool is self._pool or not fut.cancel():
+                        futures[t] = fut
+                        continue
+                fut = pool.submit(self._fetch_one, t)
+                self._inflight[t] = (fut, pool)
+                fut.add_done_callback(lambda f, t=t: self._release(t, f))
+                futures[t] = fut
+        return futures
+
+    def _release(self, ticker: str, fut: Future) -> None:
+        with self._lock:
+            entry = self._inflight.get(ticker)
+            if entry is not None and entry[0] is fut:
+                del self._inflight[ticker]
+
+    def _result(self, ticker: str, fut: Future) -> pd.DataFrame:
+        try:
+            return fut.result()
+        except CancelledError:
+            # Taken over by a foreground request (or shut down): use that fetch instead
+            with self._lock:
+                entry = self._inflight.get(ticker)
+            if entry is not None and entry[0] is not fut:
+                return self._result(ticker, entry[0])
+            return self.cache.get([ticker])
+
+    def _fetch_one(self, ticker: str) -> pd.DataFrame:
+        try:
+            df = self.fetcher([ticker])
+            self.cache.put(df)
+        except Exception as e:
+            logger.exception("Fetching %s failed", ticker)
+            df = pd.DataFrame([{"ticker": ticker, "error": str(e)}])
+        return df
+
+    def refresh_once(self) -> int:
+        """Run one refresh pass; returns the number of tickers fetched."""
+        with self._lock:
+            targets = list(self._pending)
+            self._pending.clear()
+        now = time.time()
+        ages = self.cache.fetched_at(self.watchlist)
+        targets += [t for t in self.watchlist if now - ages.get(t, 0.0) > self.ttl]
+        targets += self.cache.stale(self.ttl, self.active_within)
+        targets = _clean(targets)
+        if targets:
+            self.fetch(targets, background=True)
+        return len(targets)
+
+    def get(self, tickers: Iterable[str], force: bool = False) -> pd.DataFrame:
+        """
+        Read tickers from the shared cache, fetching only the ones that are missing.
+        Stale rows are returned as-is and queued for a background refresh.
+        With force=True the requested tickers are refetched and upserted; if a refetch
+        fails the last good cached row is returned with its 'error' set.
+        """
+        wanted = _clean(tickers)
+        if not wanted:
+            return pd.DataFrame()
+
+        cached = self.cache.get(wanted)
+        have = set(cached["ticker"]) if not cached.empty else set()
+        if force:
+            fresh = self.fetch(wanted)
+            failed: Dict[str, str] = {}
+            if "error" in fresh.columns:
+                errors = fresh.loc[fresh["error"].notna()]
+                failed = {t: e for t, e in zip(errors["ticker"], errors["error"]) if t in have}
+                fresh = fresh[~fresh["ticker"].isin(failed)]
+            # Keep the last good cached row only where the refetch failed, and say so
+            if failed:
+                cached = cached[cached["ticker"].isin(failed)].copy()
+                cached["error"] = [f"refresh failed, showing cached data: {failed[t]}" for t in cached["ticker"]]
+            else:
+                cached = pd.DataFrame()
+            frames = [cached, fresh]
+        else:
+            missing = [t for t in wanted if t not in have]
+            frames = [cached, self.fetch(missing)] if missing else [cached]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+
+        if not force:
+            now = time.time()
+            ages = self.cache.fetched_at(have)
+            stale = [t for t, ts in ages.items() if now - ts > self.ttl]
+            if stale:
+                self.request(stale)
+
+        order = {t: i for i, t in enumerate(wanted)}
+        df = pd.concat(frames, ignore_index=True)
+        df = df.sort_values("ticker", key=lambda s: s.map(order)).reset_index(drop=True)
+
+        # Same guarantee as fetch_bulk: required columns always exist
+        for c in ["shares_basic", "price"]:
+            if c not in df.columns:
+                df[c] = 1.0
+        return df
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.refresh_once()
+            except Exception:
+                logger.exception("Background refresh failed")
+            self._wake.wait(self.interval)
@@ -20,27 +20,38 @@ def _zscore(col: pd.Series) -> pd.Series:
     return (col - mu) / sd
 
 
-def score_companies(metrics: pd.DataFrame, weights: dict | None = None) -> pd.DataFrame:
+def score_companies(metrics: pd.DataFrame, weights: dict | None = None, compact: bool = False) -> pd.DataFrame:
     """
     Peer-normalized composite score on 0–100 scale with adjustable component weights.
+    With compact=True the z_* intermediates are dropped as soon as each component is
+    scored, and the sorted result is the only full-width copy of `metrics`.
     """
     w = weights or DEFAULT_WEIGHTS
-    df = metrics.copy()
 
     profit_cols = ["ebit_margin", "ebitda_margin", "roa", "roe"]
     liqu_cols = ["current_ratio", "quick_ratio"]
     cash_cols = ["ocf_margin", "fcf_margin"]
 
-    for c in profit_cols + liqu_cols + cash_cols:
-        df[f"z_{c}"] = _zscore(df[c])
+    if compact:
+        # One component at a time so at most one group of z-scores is alive
+        df = pd.DataFrame(index=metrics.index)
+        df["score_profitability"] = pd.concat([_zscore(metrics[c]) for c in profit_cols], axis=1).mean(axis=1)
+        df["score_liquidity"] = pd.concat([_zscore(metrics[c]) for c in liqu_cols], axis=1).mean(axis=1)
+        df["score_leverage"] = -_zscore(metrics["debt_to_equity"])
+        df["score_cash"] = pd.concat([_zscore(metrics[c]) for c in cash_cols], axis=1).mean(axis=1)
+    else:
+        df = metrics.copy()
 
-    # For leverage a lower debt_to_equity is better
-    df["z_debt_to_equity"] = -_zscore(df["debt_to_equity"])
+        for c in profit_cols + liqu_cols + cash_cols:
+            df[f"z_{c}"] = _zscore(df[c])
 
-    df["score_profitability"] = df[[f"z_{c}" for c in profit_cols]].mean(axis=1)
-    df["score_liquidity"] = df[[f"z_{c}" for c in liqu_cols]].mean(axis=1)
-    df["score_leverage"] = df["z_debt_to_equity"]
-    df["score_cash"] = df[[f"z_{c}" for c in cash_cols]].mean(axis=1)
+        # For leverage a lower debt_to_equity is better
+        df["z_debt_to_equity"] = -_zscore(df["debt_to_equity"])
+
+        df["score_profitability"] = df[[f"z_{c}" for c in profit_cols]].mean(axis=1)
+        df["score_liquidity"] = df[[f"z_{c}" for c in liqu_cols]].mean(axis=1)
+        df["score_leverage"] = df["z_debt_to_equity"]
+        df["score_cash"] = df[[f"z_{c}" for c in cash_cols]].mean(axis=1)
 
     df["score_total"] = (
         w["profitability"] * df["score_profitability"]
@@ -52,4 +63,12 @@ def score_companies(metrics: pd.DataFrame, weights: dict | None = None) -> pd.Da
     z = _zscore(df["score_total"])
     df["score_0_100"] = (z - z.min()) / (z.max() - z.min() + 1e-9) * 100.0
 
-    return df.sort_values("score_0_100", ascending=False)
\ No newline at end of file
+    if not compact:
+        return df.sort_values("score_0_100", ascending=False)
+
+    # Sort positions once and gather metrics + scores in that order (NaN scores last)
+    order = np.argsort(-df["score_0_100"].to_numpy(), kind="stable")
+    out = metrics.take(order)
+    for c in df.columns:
+        out[c] = df[c].to_numpy()[order]
+    return out
@@ -1,13 +1,43 @@
 # src/transform.py
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
+# Identifier columns that keep their original dtype in compact mode
+ID_COLS = {"ticker", "period", "fy", "quarter"}
 
-def prepare_financials(df: pd.DataFrame) -> pd.DataFrame:
+# Absolute amounts (USD, shares, price) stay float64 in compact mode: float32 keeps
+# only ~7 significant digits, which visibly rounds market caps in the exported report
+AMOUNT_COLS = {
+    "revenue", "ebit", "ebitda", "da", "net_income", "total_assets", "total_liabilities",
+    "current_assets", "current_liabilities", "inventory", "cash", "operating_cf", "capex",
+    "long_term_debt", "short_term_debt", "shareholders_equity", "shares_basic", "price",
+    "market_cap", "net_debt", "enterprise_value", "fcf",
+}
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Downcast to a compact layout: categorical tickers and float32 for the remaining
+    numeric columns. Identifier columns and absolute amounts keep their original dtype.
+    """
+    dtypes: dict[str, object] = {}
+    if "ticker" in df.columns:
+        dtypes["ticker"] = "category"
+    for c in df.columns:
+        if c in ID_COLS or c in AMOUNT_COLS:
+            continue
+        if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c]):
+            dtypes[c] = np.float32
+    return df.astype(dtypes)
+
+
+def prepare_financials(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
     """
     Normalize column names, fill safe NaNs, and keep the latest FY per ticker if present.
     Works for either the sample CSV or SEC-ingested data.
+    With compact=True the result uses categorical tickers (see compact_frame).
     """
     rename_map = {
         "Revenues": "revenue",
@@ -25,14 +55,23 @@ def prepare_financials(df: pd.DataFrame) -> pd.DataFrame:
         "LongTermDebtCurrent": "short_term_debt",
         "StockholdersEquity": "shareholders_equity",
     }
-    df = df.rename(columns=rename_map).copy()
+    if "fy" in df.columns:
+        # Pick the latest-FY rows from the two key columns before copying anything wide
+        keys = pd.DataFrame({"ticker": df["ticker"].to_numpy(), "fy": df["fy"].fillna(0).to_numpy()})
+        latest = keys.sort_values(["ticker", "fy"]).groupby("ticker", as_index=False).tail(1).index
+        df = df.iloc[latest]
+
+    # rename already returns a new frame, so compact mode skips the extra copy
+    df = df.rename(columns=rename_map)
+    if not compact:
+        df = df.copy()
 
     numeric_cols = [c for c in df.columns if c not in {"ticker", "period"}]
     for c in numeric_cols:
         if pd.api.types.is_numeric_dtype(df[c]):
             df[c] = df[c].fillna(0)
 
-    if "fy" in df.columns:
-        df = df.sort_values(["ticker", "fy"]).groupby("ticker", as_index=False).tail(1)
+    if compact:
+        df = compact_frame(df)
 
-    return df
\ No newline at end of file
+    return df
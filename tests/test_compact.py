@@ -0,0 +1,91 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.export import for_export
+from src.metrics import compute_metrics
+from src.scoring import score_companies
+from src.transform import prepare_financials
+
+
+def _panel(n_tickers: int = 5000, n_years: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = n_tickers * n_years
+    revenue = rng.uniform(1e8, 1e11, n)
+    return pd.DataFrame(
+        {
+            "ticker": np.repeat([f"T{i:05d}" for i in range(n_tickers)], n_years),
+            "fy": np.tile(np.arange(2020, 2020 + n_years), n_tickers),
+            "Revenues": revenue,
+            "OperatingIncomeLoss": revenue * rng.uniform(-0.1, 0.4, n),
+            "ebitda": revenue * rng.uniform(0.05, 0.5, n),
+            "NetIncomeLoss": revenue * rng.uniform(-0.1, 0.3, n),
+            "Assets": revenue * rng.uniform(0.5, 3.0, n),
+            "AssetsCurrent": revenue * rng.uniform(0.1, 1.0, n),
+            "LiabilitiesCurrent": revenue * rng.uniform(0.1, 1.0, n),
+            "InventoryNet": revenue * rng.uniform(0.0, 0.2, n),
+            "CashAndCashEquivalentsAtCarryingValue": revenue * rng.uniform(0.0, 0.5, n),
+            "NetCashProvidedByUsedInOperatingActivities": revenue * rng.uniform(-0.05, 0.4, n),
+            "PaymentsToAcquirePropertyPlantAndEquipment": -revenue * rng.uniform(0.0, 0.2, n),
+            "LongTermDebtNoncurrent": revenue * rng.uniform(0.0, 1.0, n),
+            "LongTermDebtCurrent": revenue * rng.uniform(0.0, 0.2, n),
+            "StockholdersEquity": revenue * rng.uniform(0.2, 2.0, n),
+            "shares_basic": rng.uniform(1e7, 1e10, n),
+            "price": rng.uniform(1.0, 500.0, n),
+        }
+    )
+
+
+def _pipeline(raw: pd.DataFrame, compact: bool) -> pd.DataFrame:
+    fin = prepare_financials(raw, compact=compact)
+    metrics = compute_metrics(fin, compact=compact)
+    return score_companies(metrics, compact=compact)
+
+
+def test_compact_matches_default():
+    raw = _panel(n_tickers=200)
+    full = _pipeline(raw, compact=False).set_index("ticker").sort_index()
+    small = _pipeline(raw, compact=True)
+    assert isinstance(small["ticker"].dtype, pd.CategoricalDtype)
+    small.index = small["ticker"].astype(str)
+    small = small.sort_index()
+
+    assert small["roe"].dtype == np.float32
+    assert small["market_cap"].dtype == np.float64
+    np.testing.assert_array_equal(small["market_cap"], full["market_cap"])
+    assert not any(c.startswith("z_") for c in small.columns)
+    assert list(full.index) == list(small.index)
+    for c in ["ebit_margin", "roe", "current_ratio", "debt_to_equity", "fcf_margin"]:
+        np.testing.assert_allclose(small[c], full[c], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(small["score_0_100"], full["score_0_100"], rtol=1e-4, atol=1e-3)
+
+
+def test_for_export_rounds_float32_columns():
+    df = pd.DataFrame({"quick_ratio": np.array([2.4875], dtype=np.float32), "market_cap": [295200000000.0]})
+    out = for_export(df)
+    assert out["quick_ratio"].dtype == np.float64
+    assert out.loc[0, "quick_ratio"] == 2.4875
+    assert out.loc[0, "market_cap"] == 295200000000.0
+
+
+@pytest.mark.parametrize("n_years", [1, 5])
+def test_compact_reduces_memory(n_years):
+    # Both paths keep only the latest FY before copying, so this measures dtypes and copies
+    raw = _panel(n_years=n_years)
+
+    tracemalloc.start()
+    full = _pipeline(raw, compact=False)
+    _, peak_full = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    small = _pipeline(raw, compact=True)
+    _, peak_small = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size_full = full.memory_usage(deep=True).sum()
+    size_small = small.memory_usage(deep=True).sum()
+    assert size_small < 0.75 * size_full
+    assert peak_small < 0.6 * peak_full
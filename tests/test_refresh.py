@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pandas as pd
+
+from src.refresh import RefreshService, SharedCache
+
+
+def _fake_fetcher(calls: list):
+    def fetch(tickers, executor=None):
+        tickers = list(tickers)
+        calls.append(tickers)
+        rows = [{"ticker": t, "revenue": 100.0, "price": 10.0, "shares_basic": 5.0} for t in tickers if t != "BAD"]
+        rows += [{"ticker": "BAD", "error": "not found"} for t in tickers if t == "BAD"]
+        return pd.DataFrame(rows)
+
+    return fetch
+
+
+def test_cache_roundtrip_and_invalidate(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite"))
+    cache.put(
+        pd.DataFrame(
+            [
+                {"ticker": "AAA", "revenue": 1.0, "error": None},
+                {"ticker": "BBB", "revenue": 2.0, "error": None},
+                {"ticker": "BAD", "error": "boom"},
+            ]
+        )
+    )
+    got = cache.get(["bbb", "AAA", "BAD"])
+    assert list(got["ticker"]) == ["BBB", "AAA"]
+    assert "error" not in got.columns
+
+    cache.invalidate(["AAA"])
+    assert list(cache.get(["AAA", "BBB"])["ticker"]) == ["BBB"]
+    assert cache.stale(ttl=-1) == ["BBB"]
+
+
+def test_service_reads_warm_cache_and_forces_only_requested(tmp_path):
+    calls: list = []
+    cache = SharedCache(str(tmp_path / "cache.sqlite"))
+    service = RefreshService(cache=cache, watchlist=[], fetcher=_fake_fetcher(calls))
+    try:
+        first = service.get(["MSFT", "AAPL", "BAD"])
+        assert list(first["ticker"]) == ["MSFT", "AAPL", "BAD"]
+        assert sorted(calls) == [["AAPL"], ["BAD"], ["MSFT"]]
+
+        # A second session sharing the same file reads warm data; only the failed ticker is retried
+        other = RefreshService(cache=SharedCache(cache.path), watchlist=[], fetcher=_fake_fetcher(calls))
+        try:
+            assert len(other.get(["AAPL", "MSFT", "BAD"])) == 3
+        finally:
+            other.stop()
+        assert calls[-1] == ["BAD"]
+
+        service.get(["AAPL", "MSFT"], force=True)
+        assert sorted(calls[-2:]) == [["AAPL"], ["MSFT"]]
+    finally:
+        service.stop()
+
+
+def test_refresh_once_warms_watchlist_and_stale(tmp_path):
+    calls: list = []
+    cache = SharedCache(str(tmp_path / "cache.sqlite"))
+    service = RefreshService(cache=cache, watchlist=["NVDA"], ttl=3600, fetcher=_fake_fetcher(calls))
+    try:
+        assert service.refresh_once() == 1
+        assert calls == [["NVDA"]]
+        assert service.refresh_once() == 0
+
+        service.ttl = -1
+        service.get(["NVDA"])
+        assert service.refresh_once() == 1
+    finally:
+        service.stop()
+
+
+def test_force_refresh_keeps_last_good_row_on_failure(tmp_path):
+    calls: list = []
+    cache = SharedCache(str(tmp_path / "cache.sqlite"))
+    service = RefreshService(cache=cache, watchlist=[], fetcher=_fake_fetcher(calls))
+    try:
+        service.get(["AAPL"])
+
+        def failing(tickers, executor=None):
+            return pd.DataFrame([{"ticker": t, "error": "timeout"} for t in tickers])
+
+        service.fetcher = failing
+        forced = service.get(["AAPL"], force=True)
+        assert list(forced["ticker"]) == ["AAPL"]
+        assert forced.loc[0, "revenue"] == 100.0
+        assert "timeout" in forced.loc[0, "error"]
+        assert list(cache.get(["AAPL"])["ticker"]) == ["AAPL"]
+    finally:
+        service.stop()
+
+
+def _gated_fetcher(calls: list, gate: threading.Event, slow: set):
+    fast = _fake_fetcher(calls)
+
+    def fetch(tickers, executor=None):
+        if set(tickers) & slow:
+            assert gate.wait(5)
+        return fast(tickers)
+
+    return fetch
+
+
+def _wait_for(cond, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not cond():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_foreground_fetch_does_not_queue_behind_refresh(tmp_path):
+    calls: list = []
+    gate = threading.Event()
+    watch = {f"W{i}" for i in range(20)}
+    service = RefreshService(
+        cache=SharedCache(str(tmp_path / "cache.sqlite")),
+        watchlist=sorted(watch),
+        max_workers=2,
+        fetcher=_gated_fetcher(calls, gate, watch),
+    )
+    bg = threading.Thread(target=service.refresh_once)
+    try:
+        bg.start()
+        _wait_for(lambda: len(calls) == 0 and len(service._inflight) == 20)
+        # The refresh pool is saturated by the blocked watchlist, yet NEW comes back at once
+        assert list(service.get(["NEW"])["ticker"]) == ["NEW"]
+    finally:
+        gate.set()
+        bg.join()
+        service.stop()
+
+
+def test_get_joins_in_flight_refresh_instead_of_refetching(tmp_path):
+    calls: list = []
+    gate = threading.Event()
+    service = RefreshService(
+        cache=SharedCache(str(tmp_path / "cache.sqlite")),
+        watchlist=["AAA", "BBB", "CCC"],
+        max_workers=1,
+        fetcher=_gated_fetcher(calls, gate, {"AAA"}),
+    )
+    bg = threading.Thread(target=service.refresh_once)
+    try:
+        bg.start()
+        _wait_for(lambda: len(service._inflight) == 3)
+        threading.Timer(0.2, gate.set).start()
+        # AAA is running in the background: wait for it. BBB is still queued: pull it forward.
+        df = service.get(["AAA", "BBB"])
+        assert list(df["ticker"]) == ["AAA", "BBB"]
+        bg.join()
+        assert sorted(calls) == [["AAA"], ["BBB"], ["CCC"]]
+    finally:
+        gate.set()
+        service.stop()